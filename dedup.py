@@ -0,0 +1,162 @@
+import os
+import shutil
+import hashlib
+from collections import defaultdict
+
+import numpy as np
+
+from text_utils import load_document
+
+# Режим обработки почти-дубликатов в пакетном запуске:
+#   'reuse' - анализировать только основной документ и копировать его результаты,
+#   'skip'  - пропускать дубликаты без результатов,
+#   'off'   - анализировать все файлы
+DUPLICATE_MODE = 'reuse'
+
+NUM_PERM = 64            # длина MinHash-сигнатуры
+BANDS = 8                # число полос LSH (по NUM_PERM // BANDS строк)
+SHINGLE_SIZE = 3         # длина шингла в словах
+THRESHOLD = 0.8          # минимальная оценка сходства Жаккара
+
+# Перестановки хэшей: XOR с маской и умножение на нечётное число по модулю 2**64
+# (взаимно однозначно), шинглы - сумма хэшей слов с нечётными множителями
+_rng = np.random.default_rng(20240601)
+_MASKS = _rng.integers(0, 2**64, size=NUM_PERM, dtype=np.uint64, endpoint=False)
+_MULTIPLIERS = _rng.integers(0, 2**64, size=NUM_PERM, dtype=np.uint64, endpoint=False) | np.uint64(1)
+_SHINGLE_MULTIPLIERS = _rng.integers(0, 2**64, size=SHINGLE_SIZE, dtype=np.uint64, endpoint=False) | np.uint64(1)
+
+
+def _token_hashes(tokens):
+    """64-битные хэши токенов; каждое различное слово хэшируется один раз"""
+    vocabulary = {}
+    ids = [vocabulary.setdefault(token, len(vocabulary)) for token in tokens]
+    word_hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'little')
+         for word in vocabulary),
+        dtype=np.uint64, count=len(vocabulary)
+    )
+    return word_hashes[np.array(ids, dtype=np.intp)]
+
+
+def minhash_signature(tokens, shingle_size=SHINGLE_SIZE):
+    """MinHash-сигнатура множества словесных шинглов общего потока токенов"""
+    hashes = _token_hashes(tokens)
+    count = max(1, len(hashes) - shingle_size + 1)
+    shingles = np.zeros(count, dtype=np.uint64)
+    for offset in range(shingle_size):
+        part = hashes[offset:offset + count]
+        shingles[:len(part)] += part * _SHINGLE_MULTIPLIERS[offset]
+    shingles = np.unique(shingles)
+    return np.array([((shingles ^ mask) * mult).min() for mask, mult in zip(_MASKS, _MULTIPLIERS)])
+
+
+def _similarity(sig1, sig2):
+    """Оценка сходства Жаккара по доле совпавших позиций сигнатур"""
+    return float(np.mean(sig1 == sig2))
+
+
+def find_near_duplicates(documents, threshold=THRESHOLD):
+    """Группировка почти-дубликатов в пакете документов {путь: документ}.
+
+    Документы просматриваются по порядку; кандидаты в основные отбираются
+    через LSH (совпадение хотя бы одной полосы сигнатуры). Документ
+    присоединяется к самому похожему основному, если оценка сходства с ним
+    не ниже threshold, иначе сам становится основным. Возвращает список
+    кластеров {'primary': путь, 'duplicates': [(путь, сходство), ...]}.
+    """
+    rows = NUM_PERM // BANDS
+    buckets = defaultdict(list)
+    signatures = {}
+    clusters = {}
+
+    for path, document in documents.items():
+        signature = minhash_signature(document['tokens'])
+        bands = [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(BANDS)]
+
+        candidates = dict.fromkeys(primary for key in bands for primary in buckets.get(key, ()))
+        best, best_similarity = None, 0.0
+        for primary in candidates:
+            similarity = _similarity(signatures[primary], signature)
+            if similarity >= threshold and similarity > best_similarity:
+                best, best_similarity = primary, similarity
+
+        if best is not None:
+            clusters[best].append((path, best_similarity))
+            continue
+
+        # Новый основной документ: только основные попадают в LSH-индекс
+        signatures[path] = signature
+        clusters[path] = []
+        for key in bands:
+            buckets[key].append(path)
+
+    return [
+        {'primary': primary, 'duplicates': duplicates}
+        for primary, duplicates in clusters.items() if duplicates
+    ]
+
+
+def save_duplicates_report(clusters, output_dir='Результаты анализа'):
+    """Сохранение отчёта о найденных кластерах почти-дубликатов"""
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, 'near_duplicates.txt')
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write("ПОЧТИ-ДУБЛИКАТЫ\n" + "="*60 + "\n\n")
+        for i, cluster in enumerate(clusters, 1):
+            f.write(f"{i}. {cluster['primary']}\n")
+            for path, similarity in cluster['duplicates']:
+                f.write(f"   {path} (сходство с основным: {similarity:.2f})\n")
+        f.write(f"\nВсего кластеров: {len(clusters)}\n")
+
+
+def plan_batch(file_paths, mode=None):
+    """Разбивает пакет на файлы для анализа и словарь {дубликат: основной}.
+
+    Третьим значением возвращаются уже загруженные документы
+    {путь: {'text', 'tokens'}}, чтобы анализаторы не читали файлы повторно.
+    По умолчанию режим берётся из DUPLICATE_MODE.
+    """
+    mode = mode or DUPLICATE_MODE
+    if mode == 'off' or len(file_paths) < 2:
+        return list(file_paths), {}, {}
+
+    # Нечитаемые файлы не участвуют в поиске дубликатов: их ошибку
+    # сообщит анализатор, загружая файл сам
+    documents = {}
+    for path in file_paths:
+        try:
+            documents[path] = load_document(path)
+        except (OSError, UnicodeDecodeError):
+            continue
+
+    clusters = find_near_duplicates(documents)
+    save_duplicates_report(clusters)
+
+    duplicate_of = {}
+    for cluster in clusters:
+        for path, similarity in cluster['duplicates']:
+            duplicate_of[path] = cluster['primary']
+            print(f"[INFO] {path} - почти-дубликат {cluster['primary']} (сходство: {similarity:.2f})")
+
+    to_analyze = [path for path in file_paths if path not in duplicate_of]
+    if mode == 'skip':
+        return to_analyze, {}, documents
+    return to_analyze, duplicate_of, documents
+
+
+def copy_results(primary_path, duplicate_path, suffixes, output_dir='Результаты анализа', nested=False):
+    """Копирует результаты основного документа под именем дубликата.
+
+    При nested=True результаты каждого файла лежат в своей подпапке (как в ex1).
+    """
+    primary_base = os.path.splitext(os.path.basename(primary_path))[0]
+    duplicate_base = os.path.splitext(os.path.basename(duplicate_path))[0]
+    src_dir = os.path.join(output_dir, primary_base) if nested else output_dir
+    dst_dir = os.path.join(output_dir, duplicate_base) if nested else output_dir
+    os.makedirs(dst_dir, exist_ok=True)
+
+    for suffix in suffixes:
+        src_file = os.path.join(src_dir, f'{primary_base}{suffix}')
+        if os.path.exists(src_file):
+            shutil.copyfile(src_file, os.path.join(dst_dir, f'{duplicate_base}{suffix}'))
@@ -1,6 +1,5 @@
 
 
-import re
 import os
 from collections import Counter
 import matplotlib.pyplot as plt
@@ -8,6 +7,9 @@ import numpy as np
 from PyPDF2 import PdfReader
 import warnings
 
+from dedup import plan_batch, copy_results
+from text_utils import read_text, tokenize
+
 warnings.filterwarnings('ignore')
 
 
@@ -106,36 +108,23 @@ class TextFrequencyAnalyzer:
                     extracted_text += (page.extract_text() or "") + " "
                 self.text = extracted_text
             elif file_ext == '.txt':
-                # Чтение текстового файла
-                with open(self.pdf_path, 'r', encoding='utf-8') as f:
-                    self.text = f.read()
+                # Чтение текстового файла (utf-8 или cp1251)
+                self.text = read_text(self.pdf_path)
             else:
                 print(f"[ОШИБКА] Неподдерживаемый формат файла: {file_ext}")
                 return False
             
             return True
-        except UnicodeDecodeError:
-            # Пробуем другие кодировки
-            try:
-                with open(self.pdf_path, 'r', encoding='cp1251') as f:
-                    self.text = f.read()
-                print(f"[OK] Текст извлечен из {self.filename} (кодировка cp1251)")
-                return True
-            except Exception as e:
-                print(f"[ОШИБКА] Не удалось прочитать файл {self.filename}: {e}")
-                return False
         except Exception as e:
             print(f"[ОШИБКА] Неожиданная ошибка при чтении {self.filename}: {e}")
             return False
     
-    def tokenize_text(self):
-        """Предобработка текста: токенизация и нормализация"""
-        # Приведение к нижнему регистру
-        text_lower = self.text.lower()
-        
-        # Извлечение слов (кириллица и латиница)
-        # Используем регулярное выражение для поиска слов
-        raw_tokens = re.findall(r'\b[а-яёa-z]+\b', text_lower, re.IGNORECASE)
+    def tokenize_text(self, raw_tokens=None):
+        """Предобработка текста: токенизация и нормализация
+        (raw_tokens - уже полученный общий поток токенов)"""
+        # Извлечение слов (кириллица и латиница) в нижнем регистре
+        if raw_tokens is None:
+            raw_tokens = tokenize(self.text)
         
         # Фильтрация:
         # 1) убираем слова короче 2 символов
@@ -287,16 +276,19 @@ class TextFrequencyAnalyzer:
                     output.write(f"{metric_name:<40}: {metric_value}\n")
         
     
-    def analyze(self):
+    def analyze(self, text=None, tokens=None):
         """Запускает полный анализ одного текстового файла и сохраняет
-        все результаты в отдельную подпапку внутри 'Результаты анализа'."""
+        все результаты в отдельную подпапку внутри 'Результаты анализа'.
+        Уже загруженные текст и поток токенов можно передать через text и tokens."""
 
         # Извлечение текста
-        if not self.load_text():
+        if text is not None:
+            self.text = text
+        elif not self.load_text():
             return False
 
         # Предобработка
-        self.tokenize_text()
+        self.tokenize_text(tokens)
 
         # Построение частотного словаря
         self.build_frequency_map()
@@ -319,6 +311,13 @@ class TextFrequencyAnalyzer:
         return True
 
 
+# Суффиксы файлов с результатами анализа одного документа
+REPORT_SUFFIXES = [
+    '_частотный_словарь.txt', '_статистика.txt', '_ступенчатая_функция.png',
+    '_распределение_частот.png', '_закон_ципфа.png'
+]
+
+
 def _collect_source_files(directory: str = ".", max_files: int = 4):
     """Возвращает список TXT-файлов для анализа (не более max_files штук)"""
     txt_files = [
@@ -354,13 +353,20 @@ def main():
     for file_name in source_files:
         print(f"  {file_name}")
     
+    # Почти-дубликаты не анализируются повторно
+    source_files, duplicate_of, documents = plan_batch(source_files)
+
     # Анализ каждого файла отдельно
     for source_path in source_files:
         if not os.path.exists(source_path):
             print(f"[ПРЕДУПРЕЖДЕНИЕ] Файл не найден и будет пропущен: {source_path}")
             continue
+        document = documents.get(source_path, {})
         analyzer_instance = TextFrequencyAnalyzer(source_path)
-        analyzer_instance.analyze()
+        analyzer_instance.analyze(document.get('text'), document.get('tokens'))
+
+    for duplicate_path, primary_path in duplicate_of.items():
+        copy_results(primary_path, duplicate_path, REPORT_SUFFIXES, nested=True)
     
     _print_program_footer()
 
@@ -6,6 +6,9 @@ from collections import Counter
 import nltk
 from nltk.corpus import stopwords
 
+from dedup import plan_batch, copy_results
+from text_utils import read_text, tokenize
+
 # Загрузка стоп-слов
 try:
     nltk.download('stopwords', quiet=True)
@@ -43,19 +46,14 @@ class TerminologyIndexer:
         self.abbreviations = set()
 
     def load_text(self):
-        try:
-            with open(self.filepath, 'r', encoding='utf-8') as f:
-                self.text = f.read()
-        except UnicodeDecodeError:
-            with open(self.filepath, 'r', encoding='cp1251') as f:
-                self.text = f.read()
+        self.text = read_text(self.filepath)
         
 
-    def preprocess(self):
+    def preprocess(self, raw_tokens=None):
         self.sentences = re.split(r'[.!?]+', self.text)
-        text_lower = self.text.lower()
-        self.words = re.findall(r'\b[а-яёa-z]+\b', text_lower)
-        self.words = [w for w in self.words if len(w) >= 3]
+        if raw_tokens is None:
+            raw_tokens = tokenize(self.text)
+        self.words = [w for w in raw_tokens if len(w) >= 3]
         
 
     def extract_abbreviations(self):
@@ -64,6 +62,7 @@ class TerminologyIndexer:
             r'\b[А-ЯЁA-Z]{2,10}\b',          
             r'\b[А-ЯЁA-Z](?:\.[А-ЯЁA-Z]){1,5}\b',  
             r'\b[А-ЯЁA-Z]{2,}[0-9]+\b',       
+        ]
         for pattern in patterns:
             self.abbreviations.update(re.findall(pattern, self.text))
         self.abbreviations = {abbr for abbr in self.abbreviations if 2 <= len(abbr.replace('.', '')) <= 15}
@@ -98,10 +97,15 @@ class TerminologyIndexer:
             self.trigrams = [ng for ng, _ in sorted_ngrams[:top_n]]
         
 
-    def build_index(self):
-        """Построение полного предметного указателя"""
-        self.load_text()
-        self.preprocess()
+    def build_index(self, text=None, tokens=None):
+        """Построение полного предметного указателя
+        (text - уже загруженный текст, иначе он читается из файла;
+        tokens - уже полученный общий поток токенов)"""
+        if text is None:
+            self.load_text()
+        else:
+            self.text = text
+        self.preprocess(tokens)
         self.extract_abbreviations()
         self.extract_terms()
         self.extract_ngrams(n=2)
@@ -160,14 +164,17 @@ def main():
     if not text_files:
         return
 
-
-    for f in text_files:
+    text_files, duplicate_of, documents = plan_batch(text_files)
 
     for file_path in text_files:
+        document = documents.get(file_path, {})
         indexer = TerminologyIndexer(file_path)
-        indexer.build_index()
+        indexer.build_index(document.get('text'), document.get('tokens'))
         indexer.save_index()
 
+    for duplicate_path, primary_path in duplicate_of.items():
+        copy_results(primary_path, duplicate_path, ['_subject_index.txt'])
+
 
 
 if __name__ == "__main__":
@@ -1,5 +1,17 @@
 import re
 import os
+from collections import Counter, defaultdict
+
+from dedup import plan_batch, copy_results
+from text_utils import read_text
+
+# Окончания отчеств и типичных фамилий для определения порядка слов в ФИО
+PATRONYMIC_SUFFIXES = ('ич', 'овна', 'евна', 'ична')
+FEMALE_PATRONYMIC_SUFFIXES = ('овна', 'евна', 'ична')
+SURNAME_SUFFIXES = (
+    'ов', 'ев', 'ёв', 'ин', 'ын', 'ский', 'цкий', 'ович', 'евич',
+    'ова', 'ева', 'ёва', 'ина', 'ына', 'ская', 'цкая'
+)
 
 class NameIndexIndexer:
     """Класс для построения именного указателя"""
@@ -8,6 +20,8 @@ class NameIndexIndexer:
         self.filepath = filepath
         self.text = ""
         self.personalities = set()
+        self.personality_counts = Counter()
+        self.personality_clusters = []
         self.toponyms = set()
         self.companies = set()
         self.software_products = set()
@@ -16,26 +30,25 @@ class NameIndexIndexer:
     # -------------------- Загрузка текста --------------------
     def load_text(self):
         """Загрузка текста из файла с поддержкой utf-8 и cp1251"""
-        try:
-            with open(self.filepath, 'r', encoding='utf-8') as f:
-                self.text = f.read()
-        except UnicodeDecodeError:
-            with open(self.filepath, 'r', encoding='cp1251') as f:
-                self.text = f.read()
+        self.text = read_text(self.filepath)
         
 
     # -------------------- Универсальные методы --------------------
-    def _add_matches_to_set(self, patterns, target_set, min_len=3, ignore_words=None):
-        """Ищет все совпадения по паттернам и добавляет в target_set"""
+    def _add_matches_to_set(self, patterns, target_set, min_len=3, ignore_words=None, counter=None,
+                            flags=re.IGNORECASE):
+        """Ищет все совпадения по паттернам и добавляет в target_set
+        (при переданном counter также подсчитывает число вхождений)"""
         ignore_words = ignore_words or []
         for pattern in patterns:
-            matches = re.findall(pattern, self.text, re.IGNORECASE)
+            matches = re.findall(pattern, self.text, flags)
             for match in matches:
                 if isinstance(match, tuple):
                     match = match[0] if match else ""
                 match = match.strip()
                 if match and len(match) >= min_len and not any(word in match.lower() for word in ignore_words):
                     target_set.add(match)
+                    if counter is not None:
+                        counter[match] += 1
 
     def _add_known_items(self, known_list, target_set):
         """Добавляет известные элементы, если они встречаются в тексте"""
@@ -46,14 +59,102 @@ class NameIndexIndexer:
     # -------------------- Извлечение элементов --------------------
     def extract_personalities(self):
         """Извлечение персоналий"""
-        patterns = [
-            r'\b[А-ЯЁ][а-яё]+\s+[А-ЯЁ][а-яё]+\s+[А-ЯЁ][а-яё]+\b',  # Имя Отчество Фамилия
-            r'\b[А-ЯЁ][а-яё]+\s+[А-ЯЁ]\.\s*[А-ЯЁ]\.',               # Фамилия И.О.
-            r'\b[А-ЯЁ][а-яё]+\s+[А-ЯЁ][а-яё]{3,}\b',                # Имя Фамилия
-            r'\b[А-ЯЁ]\.\s*[А-ЯЁ]\.\s+[А-ЯЁ][а-яё]{3,}\b'           # И.О. Фамилия
-        ]
-        self._add_matches_to_set(patterns, self.personalities, ignore_words=['глава', 'раздел', 'параграф', 'страница'])
-        
+        # Одно выражение с альтернативами от длинных к коротким: совпадения
+        # не перекрываются, и "Имя Отчество Фамилия" не даёт лишнего "Имя Отчество".
+        # Регистр важен - без него в совпадение попадают соседние слова.
+        # Части имени разделяются только пробелами: заголовок и следующая
+        # за ним строка не считаются одной персоналией
+        patterns = ['|'.join([
+            r'\b[А-ЯЁ][а-яё]+[ \t]+[А-ЯЁ][а-яё]+[ \t]+[А-ЯЁ][а-яё]+\b',  # Имя Отчество Фамилия / Фамилия Имя Отчество
+            r'\b[А-ЯЁ]\.[ \t]*[А-ЯЁ]\.[ \t]+[А-ЯЁ][а-яё]{3,}\b',           # И.О. Фамилия
+            # Фамилия И.О. - если за инициалами не следует фамилия
+            # (иначе "Затем И.И. Иванов" дало бы "Затем И.И.")
+            r'\b[А-ЯЁ][а-яё]+[ \t]+[А-ЯЁ]\.[ \t]*[А-ЯЁ]\.(?![ \t]*[А-ЯЁ][а-яё])',
+            r'\b[А-ЯЁ][а-яё]+[ \t]+[А-ЯЁ][а-яё]{3,}\b'                    # Имя Фамилия
+        ])]
+        self._add_matches_to_set(patterns, self.personalities, ignore_words=['глава', 'раздел', 'параграф', 'страница'],
+                                 counter=self.personality_counts, flags=0)
+
+    @staticmethod
+    def _is_patronymic(word):
+        """Похоже ли слово на отчество"""
+        return word.endswith(PATRONYMIC_SUFFIXES)
+
+    @staticmethod
+    def _is_surname(word):
+        """Похоже ли слово на фамилию"""
+        return word.endswith(SURNAME_SUFFIXES)
+
+    @staticmethod
+    def _personality_key(name):
+        """Нормализация персоналии: возвращает (фамилия, инициалы) или None"""
+        parts = re.findall(r'[А-ЯЁ][а-яё]+|[А-ЯЁ]\.', name)
+        words = [p for p in parts if not p.endswith('.')]
+        initials = ''.join(p[0] for p in parts if p.endswith('.'))
+        if initials:
+            # Фамилия И.О. / И.О. Фамилия
+            if len(words) != 1:
+                return None
+            surname = words[0]
+        elif len(words) == 2:
+            first, last = words
+            if last.endswith(FEMALE_PATRONYMIC_SUFFIXES):
+                # Имя Отчество без фамилии
+                return None
+            if NameIndexIndexer._is_surname(first) and not NameIndexIndexer._is_surname(last):
+                # Фамилия Имя
+                surname, initials = first, last[0]
+            else:
+                # Имя Фамилия
+                surname, initials = last, first[0]
+        elif len(words) == 3:
+            first, middle, last = words
+            if not NameIndexIndexer._is_patronymic(middle) and NameIndexIndexer._is_patronymic(last):
+                # Фамилия Имя Отчество
+                surname, initials = first, middle[0] + last[0]
+            else:
+                # Имя Отчество Фамилия
+                surname, initials = last, first[0] + middle[0]
+        else:
+            return None
+        return surname, initials
+
+    def cluster_personalities(self):
+        """Группировка вариантов написания одной персоналии.
+
+        Блокирующий индекс по ключу (фамилия, первый инициал) позволяет
+        сравнивать варианты только внутри блока, а не все пары персоналий.
+        """
+        blocks = defaultdict(lambda: defaultdict(Counter))
+        for name in self.personalities:
+            key = self._personality_key(name)
+            if key is None:
+                key = (name, '')
+            surname, initials = key
+            blocks[(surname.lower().replace('ё', 'е'), initials[:1])][initials][name] += self.personality_counts[name] or 1
+
+        self.personality_clusters = []
+        for (_, first_initial), by_initials in blocks.items():
+            full = [i for i in by_initials if len(i) > 1]
+            # Вариант только с именем (без отчества) присоединяем к единственному
+            # полному набору инициалов в блоке, иначе он остаётся отдельным
+            if len(full) == 1 and first_initial in by_initials:
+                by_initials[full[0]].update(by_initials.pop(first_initial))
+            for initials, variants in by_initials.items():
+                sample = variants.most_common(1)[0][0]
+                key = self._personality_key(sample)
+                if key is None:
+                    canonical = sample
+                else:
+                    canonical = f"{key[0]} " + ''.join(f"{c}." for c in initials)
+                self.personality_clusters.append({
+                    'canonical': canonical,
+                    'count': sum(variants.values()),
+                    'variants': variants.most_common()
+                })
+        self.personality_clusters.sort(key=lambda c: c['canonical'])
+        return self.personality_clusters
+
 
     def extract_toponyms(self):
         """Извлечение топонимов"""
@@ -105,16 +206,22 @@ class NameIndexIndexer:
         
 
     # -------------------- Построение и сохранение --------------------
-    def build_index(self):
-        """Полное построение именного указателя"""
-        self.load_text()
+    def build_index(self, text=None):
+        """Полное построение именного указателя
+        (text - уже загруженный текст, иначе он читается из файла)"""
+        if text is None:
+            self.load_text()
+        else:
+            self.text = text
         self.extract_personalities()
+        self.cluster_personalities()
         self.extract_toponyms()
         self.extract_companies()
         self.extract_software_products()
         self.extract_abbreviations()
         return {
             'personalities': self.personalities,
+            'personality_clusters': self.personality_clusters,
             'toponyms': self.toponyms,
             'companies': self.companies,
             'software_products': self.software_products,
@@ -128,7 +235,6 @@ class NameIndexIndexer:
         output_file = os.path.join(output_dir, f'{base_name}_name_index.txt')
 
         sections = [
-            ('ПЕРСОНАЛИИ', self.personalities),
             ('ТОПОНИМЫ', self.toponyms),
             ('КОМПАНИИ', self.companies),
             ('ПРОГРАММНЫЕ ПРОДУКТЫ', self.software_products),
@@ -137,7 +243,13 @@ class NameIndexIndexer:
 
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write("ИМЕННОЙ УКАЗАТЕЛЬ\n" + "="*60 + "\n\n")
-            total_count = 0
+            f.write("ПЕРСОНАЛИИ\n" + "-"*60 + "\n")
+            for i, cluster in enumerate(self.personality_clusters, 1):
+                f.write(f"{i}. {cluster['canonical']} (упоминаний: {cluster['count']})\n")
+                variants = ', '.join(f"{name} ({count})" for name, count in cluster['variants'])
+                f.write(f"   варианты: {variants}\n")
+            f.write(f"\nВсего персоналии: {len(self.personality_clusters)}\n\n")
+            total_count = len(self.personality_clusters)
             for title, items in sections:
                 f.write(f"{title}\n" + "-"*60 + "\n")
                 for i, item in enumerate(sorted(items), 1):
@@ -159,12 +271,18 @@ def main():
     # Ограничение до 4 файлов
     text_files = text_files[:4]
 
+    # Почти-дубликаты не анализируются повторно
+    text_files, duplicate_of, documents = plan_batch(text_files)
+
     for file_path in text_files:
         
         indexer = NameIndexIndexer(file_path)
-        indexer.build_index()
+        indexer.build_index(documents.get(file_path, {}).get('text'))
         indexer.save_index()
 
+    for duplicate_path, primary_path in duplicate_of.items():
+        copy_results(primary_path, duplicate_path, ['_name_index.txt'])
+
     
 if __name__ == "__main__":
     main()
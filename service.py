@@ -0,0 +1,276 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ex1 import TextFrequencyAnalyzer
+from ex2 import TerminologyIndexer
+from ex3 import NameIndexIndexer
+from text_utils import read_text
+
+
+# -------------------- Конвейеры анализа --------------------
+def _run_frequency(text, top_n=100):
+    """Частотный анализ (ex1) без построения графиков"""
+    analyzer = TextFrequencyAnalyzer('service.txt')
+    analyzer.text = text
+    analyzer.tokenize_text()
+    analyzer.build_frequency_map()
+    stats = analyzer.compute_statistics() if analyzer.words else {}
+    total_words = len(analyzer.words)
+    return {
+        'statistics': {
+            name: value.item() if hasattr(value, 'item') else value
+            for name, value in stats.items()
+        },
+        'frequencies': [
+            {'word': word, 'count': freq, 'percent': freq / total_words * 100}
+            for word, freq in analyzer.sorted_frequencies[:top_n]
+        ]
+    }
+
+
+def _run_terminology(text):
+    """Предметный указатель (ex2)"""
+    indexer = TerminologyIndexer('service.txt')
+    indexer.build_index(text)
+    return {
+        'terms': sorted(indexer.terms),
+        'bigrams': indexer.bigrams,
+        'trigrams': indexer.trigrams,
+        'abbreviations': sorted(indexer.abbreviations)
+    }
+
+
+def _run_names(text):
+    """Именной указатель (ex3)"""
+    indexer = NameIndexIndexer('service.txt')
+    index = indexer.build_index(text)
+    return {
+        name: items if name == 'personality_clusters' else sorted(items)
+        for name, items in index.items()
+    }
+
+
+PIPELINES = {
+    '/frequency': _run_frequency,
+    '/terminology': _run_terminology,
+    '/names': _run_names,
+}
+
+
+def _run_pipeline(path, text):
+    """Точка входа рабочего процесса: выполняет конвейер по пути запроса"""
+    return PIPELINES[path](text)
+
+
+# -------------------- Кэш результатов --------------------
+def _estimate_size(obj):
+    """Грубая оценка занимаемой объектом памяти в байтах"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(_estimate_size(item) for item in obj)
+    return size
+
+
+class DocumentCache:
+    """LRU-кэш проанализированных документов с вытеснением по объёму памяти.
+
+    Ключ - SHA-256 содержимого документа, значение - результаты
+    уже выполненных для него конвейеров.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest, path):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or path not in entry['results']:
+                return None
+            self._entries.move_to_end(digest)
+            return entry['results'][path]
+
+    def put(self, digest, path, result):
+        size = _estimate_size(result)
+        with self._lock:
+            entry = self._entries.setdefault(digest, {'results': {}, 'size': 0})
+            if path in entry['results']:
+                return
+            entry['results'][path] = result
+            entry['size'] += size
+            self.used_bytes += size
+            self._entries.move_to_end(digest)
+            # Вытесняем давно не использованные документы, кроме текущего
+            while self.used_bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.used_bytes -= evicted['size']
+
+    def stats(self):
+        with self._lock:
+            return {
+                'documents': len(self._entries),
+                'used_bytes': self.used_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+
+# -------------------- HTTP-сервис --------------------
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """Обработчик JSON-запросов к конвейерам анализа"""
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_document(self):
+        """Текст документа из тела запроса: {"text": ...} или {"path": ...}"""
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if not isinstance(request, dict):
+            raise ValueError("тело запроса должно быть JSON-объектом")
+        if 'text' in request:
+            if not isinstance(request['text'], str):
+                raise ValueError("поле 'text' должно быть строкой")
+            return request['text']
+        if 'path' in request:
+            if not isinstance(request['path'], str):
+                raise ValueError("поле 'path' должно быть строкой")
+            return read_text(self.server.resolve_path(request['path']))
+        raise ValueError("ожидается поле 'text' или 'path'")
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'cache': self.server.cache.stats()})
+        else:
+            self._send_json(404, {'error': f'неизвестный путь: {self.path}'})
+
+    def do_POST(self):
+        if self.path not in PIPELINES:
+            self._send_json(404, {'error': f'неизвестный путь: {self.path}'})
+            return
+        try:
+            text = self._read_document()
+        except (ValueError, OSError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        result = self.server.cache.get(digest, self.path)
+        cached = result is not None
+        if not cached:
+            try:
+                result = self.server.analyze(digest, self.path, text)
+            except Exception as e:
+                self._send_json(500, {'error': str(e) or type(e).__name__})
+                return
+        self._send_json(200, {'sha256': digest, 'cached': cached, 'result': result})
+
+
+class AnalysisServer(ThreadingHTTPServer):
+    """HTTP-сервер: запросы обрабатываются в потоках, анализ - в пуле процессов"""
+
+    daemon_threads = True
+
+    def __init__(self, address, workers, cache_bytes, root=None):
+        super().__init__(address, AnalysisRequestHandler)
+        self.workers = workers
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.cache = DocumentCache(cache_bytes)
+        # Запросы {"path": ...} разрешены только для файлов внутри root
+        self.root = os.path.realpath(root) if root else None
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def resolve_path(self, path):
+        """Абсолютный путь к файлу внутри root; иначе ValueError"""
+        if self.root is None:
+            raise ValueError("поле 'path' отключено: сервис запущен без --root")
+        real_path = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([self.root, real_path]) != self.root:
+            raise ValueError(f"путь вне разрешённого каталога: {path}")
+        return real_path
+
+    def _restart_pool(self, broken):
+        """Пересоздаёт пул после падения рабочего процесса (однократно)"""
+        with self._lock:
+            if self.pool is broken:
+                broken.shutdown(wait=False)
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def analyze(self, digest, path, text):
+        """Результат конвейера для документа.
+
+        Одновременные запросы одного и того же документа ждут одно
+        вычисление; результат кладётся в кэш до снятия задачи из списка
+        выполняющихся, поэтому повторный запрос не запускает анализ заново.
+        """
+        key = (digest, path)
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                pool = self.pool
+                try:
+                    future = pool.submit(_run_pipeline, path, text)
+                except BrokenProcessPool:
+                    pool.shutdown(wait=False)
+                    pool = self.pool = ProcessPoolExecutor(max_workers=self.workers)
+                    future = pool.submit(_run_pipeline, path, text)
+                self._in_flight[key] = future
+        if not owner:
+            return future.result()
+
+        try:
+            result = future.result()
+            self.cache.put(digest, path, result)
+            return result
+        except BrokenProcessPool:
+            self._restart_pool(pool)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Локальный HTTP-сервис анализа текстов')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--cache-mb', type=int, default=256, help='объём кэша документов, МБ')
+    parser.add_argument('--root', help='каталог, из которого разрешено читать файлы по полю path')
+    args = parser.parse_args()
+
+    server = AnalysisServer((args.host, args.port), args.workers, args.cache_mb * 1024 * 1024, args.root)
+    print(f"Сервис анализа запущен: http://{args.host}:{args.port}")
+    print("Конвейеры: POST " + ", ".join(PIPELINES) + "; состояние: GET /health")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import re
+
+
+def read_text(filepath):
+    """Чтение текстового файла с поддержкой utf-8 и cp1251"""
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return f.read()
+    except UnicodeDecodeError:
+        with open(filepath, 'r', encoding='cp1251') as f:
+            return f.read()
+
+
+def tokenize(text):
+    """Общий поток токенов: слова (кириллица и латиница) в нижнем регистре
+    без фильтрации - стоп-слова и длину отсекает каждый анализатор сам"""
+    return re.findall(r'\b[а-яёa-z]+\b', text.lower())
+
+
+def load_document(filepath):
+    """Текст документа и его поток токенов"""
+    text = read_text(filepath)
+    return {'text': text, 'tokens': tokenize(text)}